@@ -3,11 +3,87 @@ import time
 import os
 import re
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, quote
 import html2text
 from ebooklib import epub
 import datetime
 import json
+import hashlib
+import html
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+VOLUME_PARTITIONS = ('month', 'section', 'size')
+
+
+def render_chapter_html(article):
+    """将单篇文章渲染为EPUB章节HTML"""
+    chapter_content = f"""
+    <html xmlns="http://www.w3.org/1999/xhtml">
+    <head><title>{article['title']}</title></head>
+    <body>
+    <h1>{article['title']}</h1>
+    <p><strong>原文链接:</strong> <a href="{article['url']}">{article['url']}</a></p>
+    <p><strong>爬取日期:</strong> {article['date']}</p>
+    <hr/>
+    """
+    
+    # 简单的markdown到html转换
+    md_content = article['content']
+    md_content = md_content.replace('&', '&amp;')
+    md_content = md_content.replace('<', '&lt;')
+    md_content = md_content.replace('>', '&gt;')
+    md_content = md_content.replace('\n\n', '</p><p>')
+    md_content = f"<p>{md_content}</p>"
+    md_content = re.sub(r'<p># (.*?)</p>', r'<h1>\1</h1>', md_content)
+    md_content = re.sub(r'<p>## (.*?)</p>', r'<h2>\1</h2>', md_content)
+    md_content = re.sub(r'<p>### (.*?)</p>', r'<h3>\1</h3>', md_content)
+    md_content = re.sub(r'<p>\*\*(.*?)\*\*</p>', r'<p><strong>\1</strong></p>', md_content)
+    md_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', md_content)
+    
+    chapter_content += md_content
+    chapter_content += "\n</body>\n</html>"
+    return chapter_content
+
+
+def build_volume_epub(volume):
+    """在独立进程中构建单个分卷EPUB"""
+    print(f"正在创建分卷: {volume['title']}")
+    
+    book = epub.EpubBook()
+    book.set_identifier(f"chentianyuzhou-volume-{volume['key']}")
+    book.set_title(volume['title'])
+    book.set_language('zh-CN')
+    book.add_author('陈天宇宙')
+    
+    toc_items = []
+    spine = ['nav']
+    
+    for i, article in enumerate(volume['articles'], 1):
+        chapter = epub.EpubHtml(
+            title=article['title'],
+            file_name=f'chapter_{i:03d}.xhtml',
+            lang='zh-CN'
+        )
+        chapter.content = render_chapter_html(article)
+        
+        book.add_item(chapter)
+        toc_items.append(chapter)
+        spine.append(chapter)
+    
+    book.toc = toc_items
+    book.spine = spine
+    
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    
+    try:
+        epub.write_epub(volume['path'], book)
+        print(f"分卷已创建: {volume['path']}")
+        return volume['path']
+    except Exception as e:
+        print(f"创建分卷失败 {volume['path']}: {e}")
+        return None
+
 
 class ChentianYuZhouCrawler:
     def __init__(self):
@@ -298,33 +374,7 @@ class ChentianYuZhouCrawler:
                 lang='zh-CN'
             )
             
-            # 将markdown转换为HTML
-            chapter_content = f"""
-            <html xmlns="http://www.w3.org/1999/xhtml">
-            <head><title>{article['title']}</title></head>
-            <body>
-            <h1>{article['title']}</h1>
-            <p><strong>原文链接:</strong> <a href="{article['url']}">{article['url']}</a></p>
-            <p><strong>爬取日期:</strong> {article['date']}</p>
-            <hr/>
-            """
-            
-            # 简单的markdown到html转换
-            md_content = article['content']
-            md_content = md_content.replace('&', '&amp;')
-            md_content = md_content.replace('<', '&lt;')
-            md_content = md_content.replace('>', '&gt;')
-            md_content = md_content.replace('\n\n', '</p><p>')
-            md_content = f"<p>{md_content}</p>"
-            md_content = re.sub(r'<p># (.*?)</p>', r'<h1>\1</h1>', md_content)
-            md_content = re.sub(r'<p>## (.*?)</p>', r'<h2>\1</h2>', md_content)
-            md_content = re.sub(r'<p>### (.*?)</p>', r'<h3>\1</h3>', md_content)
-            md_content = re.sub(r'<p>\*\*(.*?)\*\*</p>', r'<p><strong>\1</strong></p>', md_content)
-            md_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', md_content)
-            
-            chapter_content += md_content
-            chapter_content += "\n</body>\n</html>"
-            chapter.content = chapter_content
+            chapter.content = render_chapter_html(article)
             
             book.add_item(chapter)
             toc_items.append(chapter)
@@ -349,8 +399,231 @@ class ChentianYuZhouCrawler:
             print(f"创建EPUB失败: {e}")
             return None
     
-    def run(self):
-        """运行爬虫"""
+    def load_volume_archive(self, output_dir='volumes'):
+        """合并历史归档与本次爬取的文章，保留每篇文章的首次收录日期"""
+        archive_path = os.path.join(output_dir, 'archive.json')
+        archive = []
+        if os.path.exists(archive_path):
+            try:
+                with open(archive_path, 'r', encoding='utf-8') as f:
+                    archive = json.load(f)
+            except Exception as e:
+                print(f"读取文章归档失败，将从本次爬取重新开始: {e}")
+                archive = []
+        
+        articles = {(a['url'], a['title']): a for a in archive}
+        for article in self.articles:
+            if article.get('placeholder'):
+                # 自动生成的说明文章每次内容都不同，不进入归档
+                continue
+            key = (article['url'], article['title'])
+            if key in articles:
+                # 已收录的文章更新内容，但沿用首次收录日期
+                articles[key] = dict(article, date=articles[key]['date'])
+            else:
+                articles[key] = dict(article)
+        
+        # 按首次收录日期和URL排序，新文章总是排在最后，分卷划分保持稳定
+        archive = sorted(articles.values(), key=lambda a: (a['date'], a['url'], a['title']))
+        
+        with open(archive_path, 'w', encoding='utf-8') as f:
+            json.dump(archive, f, ensure_ascii=False, indent=2)
+        
+        return archive
+    
+    def partition_articles(self, partition_by='month', max_volume_chars=500000, articles=None):
+        """按收录月份、URL栏目或大小上限将文章划分为分卷"""
+        if articles is None:
+            articles = self.articles
+        partitions = {}
+        
+        if partition_by == 'month':
+            for article in articles:
+                key = article['date'][:7]
+                partitions.setdefault(key, []).append(article)
+        elif partition_by == 'section':
+            for article in articles:
+                path = urlparse(article['url']).path.strip('/')
+                key = path.split('/')[0] if path else 'home'
+                key = re.sub(r'[^\w-]', '', key) or 'home'
+                partitions.setdefault(key, []).append(article)
+        elif partition_by == 'size':
+            # 文章需按首次收录日期排序，新增文章才只会影响最后一卷
+            index = 1
+            volume_chars = 0
+            for article in articles:
+                article_chars = len(article['content'])
+                if volume_chars and volume_chars + article_chars > max_volume_chars:
+                    index += 1
+                    volume_chars = 0
+                partitions.setdefault(f"{index:03d}", []).append(article)
+                volume_chars += article_chars
+        else:
+            raise ValueError(f"不支持的分卷方式: {partition_by}")
+        
+        return partitions
+    
+    def create_volume_epubs(self, partition_by='month', max_volume_chars=500000,
+                            output_dir='volumes', max_workers=None):
+        """并行创建分卷EPUB，并生成链接各分卷的索引电子书"""
+        print(f"正在按 {partition_by} 创建分卷EPUB...")
+        
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        manifest_path = os.path.join(output_dir, 'manifest.json')
+        manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                print(f"读取分卷清单失败，将全部重建: {e}")
+                manifest = {}
+        
+        archive = self.load_volume_archive(output_dir)
+        partitions = self.partition_articles(partition_by, max_volume_chars, archive)
+        
+        volumes = []
+        pending = []
+        for key in sorted(partitions):
+            articles = partitions[key]
+            volume_id = f"{partition_by}-{key}"
+            filename = f"陈天宇宙-{volume_id}.epub"
+            path = os.path.join(output_dir, filename)
+            
+            # 只对文章内容计算指纹，生成时间等不参与比较
+            digest = hashlib.sha256(json.dumps(
+                [[a['title'], a['url'], a['date'], a['content']] for a in articles],
+                ensure_ascii=False
+            ).encode('utf-8')).hexdigest()
+            
+            volume = {
+                'key': volume_id,
+                'title': f"陈天宇宙 - 支付学习社区文章集合 ({key})",
+                'filename': filename,
+                'path': path,
+                'hash': digest,
+                'articles': articles,
+            }
+            volumes.append(volume)
+            
+            if manifest.get(volume_id, {}).get('hash') == digest and os.path.exists(path):
+                print(f"分卷未变化，跳过: {filename}")
+            else:
+                pending.append(volume)
+        
+        built = set()
+        if pending:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(build_volume_epub, volume): volume for volume in pending}
+                    for future in as_completed(futures):
+                        volume = futures[future]
+                        try:
+                            if future.result():
+                                built.add(volume['key'])
+                        except Exception as e:
+                            print(f"创建分卷失败 {volume['path']}: {e}")
+            except Exception as e:
+                print(f"分卷进程池异常: {e}")
+        
+        # 归档包含全部文章，当前分卷方式的清单只由本次划分结果生成；
+        # 其他分卷方式的记录在文件仍存在时保留
+        prefix = f"{partition_by}-"
+        volume_keys = {volume['key'] for volume in volumes}
+        new_manifest = {}
+        for key, value in manifest.items():
+            path = os.path.join(output_dir, value['filename'])
+            if not key.startswith(prefix):
+                if os.path.exists(path):
+                    new_manifest[key] = value
+            elif key not in volume_keys and os.path.exists(path):
+                os.remove(path)
+                print(f"已删除过期分卷: {value['filename']}")
+        pending_keys = {volume['key'] for volume in pending}
+        for volume in volumes:
+            if volume['key'] in pending_keys and volume['key'] not in built:
+                # 构建失败的分卷不写入清单，下次重新构建
+                continue
+            new_manifest[volume['key']] = {
+                'hash': volume['hash'],
+                'filename': volume['filename'],
+                'title': volume['title'],
+                'articles': [a['title'] for a in volume['articles']],
+            }
+        
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(new_manifest, f, ensure_ascii=False, indent=2)
+        
+        print(f"分卷完成: 共 {len(volumes)} 卷，重建 {len(built)} 卷，跳过 {len(volumes) - len(pending)} 卷")
+        
+        return self.create_volume_index(new_manifest, partition_by, output_dir)
+    
+    def create_volume_index(self, manifest, partition_by='month', output_dir='volumes'):
+        """根据分卷清单创建索引电子书
+        
+        分卷链接指向索引文件同目录下的其他EPUB文件，并非书内资源，
+        只有部分阅读器会跟随此类链接打开对应分卷。
+        """
+        volumes = [manifest[key] for key in sorted(manifest)
+                   if key.startswith(f"{partition_by}-")]
+        
+        book = epub.EpubBook()
+        
+        book.set_identifier(f'chentianyuzhou-volume-index-{partition_by}')
+        book.set_title('陈天宇宙 - 支付学习社区文章集合 - 分卷索引')
+        book.set_language('zh-CN')
+        book.add_author('陈天宇宙')
+        
+        index_chapter = epub.EpubHtml(
+            title='分卷索引',
+            file_name='index.xhtml',
+            lang='zh-CN'
+        )
+        index_content = f"""
+        <html xmlns="http://www.w3.org/1999/xhtml">
+        <head><title>分卷索引</title></head>
+        <body>
+        <h1>陈天宇宙 - 支付学习社区文章集合</h1>
+        <p><strong>生成时间:</strong> {datetime.datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}</p>
+        <p><strong>分卷数量:</strong> {len(volumes)} 卷，共 {sum(len(v['articles']) for v in volumes)} 篇</p>
+        <hr/>
+        """
+        for volume in volumes:
+            index_content += f"""
+        <h2><a href="{quote(volume['filename'])}">{html.escape(volume['title'])}</a></h2>
+        <ul>
+        """
+            for title in volume['articles']:
+                index_content += f"<li>{html.escape(title)}</li>\n"
+            index_content += "</ul>\n"
+        index_content += "\n</body>\n</html>"
+        index_chapter.content = index_content
+        book.add_item(index_chapter)
+        
+        book.toc = [index_chapter]
+        book.spine = ['nav', index_chapter]
+        
+        book.add_item(epub.EpubNcx())
+        book.add_item(epub.EpubNav())
+        
+        index_filename = os.path.join(output_dir, f'陈天宇宙-{partition_by}-分卷索引.epub')
+        
+        try:
+            epub.write_epub(index_filename, book)
+            print(f"分卷索引已创建: {index_filename}")
+            return index_filename
+        except Exception as e:
+            print(f"创建分卷索引失败: {e}")
+            return None
+    
+    def run(self, volume_partition=None, volume_dir='volumes'):
+        """运行爬虫，指定volume_partition时按month/section/size生成分卷EPUB"""
+        # 爬取前先校验分卷方式，避免爬取完成后才报错
+        if volume_partition and volume_partition not in VOLUME_PARTITIONS:
+            raise ValueError(f"不支持的分卷方式: {volume_partition}")
+        
         print("开始爬取陈天宇宙网站...")
         print("网站描述: 支付学习社区，支付产品经理、技术、测试、商务都在看的支付内容社区")
         
@@ -402,7 +675,8 @@ class ChentianYuZhouCrawler:
 2. 使用浏览器的开发者工具查看网络请求
 3. 考虑使用更高级的爬虫工具（如Selenium）
 """,
-                'date': datetime.datetime.now().strftime('%Y-%m-%d')
+                'date': datetime.datetime.now().strftime('%Y-%m-%d'),
+                'placeholder': True
             }
             self.articles.append(info_article)
         
@@ -412,7 +686,10 @@ class ChentianYuZhouCrawler:
         self.save_markdown_files()
         
         # 创建epub
-        epub_file = self.create_epub()
+        if volume_partition:
+            epub_file = self.create_volume_epubs(volume_partition, output_dir=volume_dir)
+        else:
+            epub_file = self.create_epub()
         
         print(f"任务完成！")
         print(f"- 生成了 {len(self.articles)} 篇文章的markdown文件")
@@ -426,10 +703,18 @@ class ChentianYuZhouCrawler:
             print(f"  📄 {file}")
         for file in glob.glob("*.epub"):
             print(f"  📚 {file}")
+        if volume_partition:
+            for file in glob.glob(os.path.join(volume_dir, "*.epub")):
+                print(f"  📚 {file}")
 
 if __name__ == "__main__":
+    import sys
+    volume_partition = sys.argv[1] if len(sys.argv) > 1 else None
+    if volume_partition and volume_partition not in VOLUME_PARTITIONS:
+        print(f"用法: python crawler.py [{'|'.join(VOLUME_PARTITIONS)}]")
+        sys.exit(1)
     crawler = ChentianYuZhouCrawler()
-    crawler.run()
+    crawler.run(volume_partition)
     
     def crawl_article(self, url):
         """爬取单篇文章"""